@@ -0,0 +1,1116 @@
+"""
+Shared client for sending fatal log notifications to the Ocean Current API.
+
+Fetches the EC2 instance identity PKCS7 signature from the instance metadata
+service and sends fatal log events to the monitoring endpoint, either directly
+or through the --batch/--flush spool. Used by trigger_fatal_log.py and
+test_local_auth.py; not meant to be run on its own.
+"""
+
+import sys
+import os
+import gzip
+import http.client
+import json
+import socket
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+
+# POSIX-only modules (fcntl, signal, socketserver) are imported by the spool and daemon
+# code that needs them, so the module can be imported anywhere for fetch_pkcs7() and
+# the JSON helpers.
+
+# Use orjson for encoding requests and parsing responses when it is installed
+# (falls back to the stdlib json module). _json_dumps returns UTF-8 encoded bytes.
+try:
+    import orjson
+    json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+
+    def _json_dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+# EC2 Instance Metadata Service endpoints (IMDSv2)
+# The link-local metadata service is plain HTTP, so it is queried with the stdlib http.client;
+# `requests` is only imported for the backend HTTPS call.
+# Host and request paths are kept separate so no URL is built or parsed per request.
+IMDS_HOST = "169.254.169.254"
+IMDS_PORT = 80
+IMDS_TOKEN_PATH = "/latest/api/token"
+IMDS_PKCS7_PATH = "/latest/dynamic/instance-identity/pkcs7"
+
+# Backend API endpoint for fatal log notifications
+# Reads from config file or environment variable (config file takes precedence)
+# Config file location: /etc/imos/oc_api_endpoint.conf or ./oc_api_endpoint.conf
+def load_api_endpoint():
+    """Load API endpoint from config file or environment variable."""
+    # Try config file locations (in order of preference)
+    config_locations = [
+        "/etc/imos/oc_api_endpoint.conf",  # System-wide config
+        os.path.join(os.path.dirname(__file__), "oc_api_endpoint.conf"),  # Local to script
+    ]
+
+    for config_file in config_locations:
+        try:
+            with open(config_file, 'r') as f:
+                endpoint = f.read().strip()
+                if endpoint:
+                    return endpoint
+        except OSError:
+            pass  # Missing or unreadable, try next location
+
+    # Fallback to environment variable
+    return os.getenv("OC_API_ENDPOINT")
+
+
+# Directory for the cache files shared between invocations (tmpfs, cleared on reboot)
+RUN_DIR = "/var/run/imos"
+
+# Cache directory actually in use, resolved on first use by _cache_dir() ("" when caching is disabled)
+_cache_dir_path = None
+
+
+def _private_dir(path):
+    """
+    Create `path` if needed and check it is a directory only the current user can use.
+
+    Returns:
+        True if `path` is a real directory (not a symlink) owned by the current user,
+        with mode 0700 and writable, False otherwise
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+            return False
+        if stat.S_IMODE(st.st_mode) != 0o700:
+            os.chmod(path, 0o700)
+        return os.access(path, os.W_OK | os.X_OK)
+    except OSError:
+        return False
+
+
+def _cache_dir():
+    """
+    Return the directory for the cache files shared between invocations.
+
+    Uses /var/run/imos when it can be created and is owned by the current user,
+    otherwise a per-user imos-<uid> directory in the system temp directory (e.g.
+    when not running as root). Returns None, disabling the caches, when neither
+    is usable.
+    """
+    global _cache_dir_path
+    if _cache_dir_path is None:
+        user_dir = os.path.join(tempfile.gettempdir(), f"imos-{os.getuid()}")
+        _cache_dir_path = next((path for path in (RUN_DIR, user_dir) if _private_dir(path)), "")
+    return _cache_dir_path or None
+
+
+def _cache_file(name):
+    """Return the path of cache file `name`, or None when caching is disabled."""
+    cache_dir = _cache_dir()
+    return os.path.join(cache_dir, name) if cache_dir else None
+
+# Metadata service timeouts (seconds). The service is link-local, so a connection
+# that is not established quickly means it is unreachable (e.g. not on EC2).
+METADATA_CONNECT_TIMEOUT = 0.5
+METADATA_TIMEOUT = 2  # Per read
+IMDS_TOKEN_TTL_SECONDS = 21600  # 6 hours
+
+# Backend timeouts (seconds) and retries. Connection failures are retried, as are gateway
+# errors; a request that was sent but got no response in time is not.
+BACKEND_CONNECT_TIMEOUT = 2
+BACKEND_READ_TIMEOUT = 10
+BACKEND_RETRIES = 2
+BACKEND_RETRY_BACKOFF_FACTOR = 0.2
+BACKEND_RETRY_STATUSES = (502, 503, 504)
+BACKEND_RETRY_METHODS = frozenset(["POST"])  # Other requests (the HEAD warm-up) are never retried
+
+# Retries for transient metadata service failures (connection errors, throttling, 5xx)
+METADATA_RETRIES = 2
+METADATA_RETRY_BACKOFF_SECONDS = 0.1  # Doubled after each attempt
+METADATA_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# IMDSv2 token cache shared between invocations (token is valid for IMDS_TOKEN_TTL_SECONDS)
+IMDS_TOKEN_CACHE_NAME = "imds_token"
+IMDS_TOKEN_CACHE_SLACK_SECONDS = 3600  # Refresh an hour before the token expires
+
+# Token provided by the environment (e.g. injected by an orchestrator), used before the cache
+IMDS_TOKEN_ENV_VAR = "AWS_EC2_METADATA_TOKEN"
+
+# PKCS7 signature cache, keyed by boot ID (the signature is stable until the instance restarts)
+PKCS7_CACHE_NAME = "pkcs7_cache.json"
+BOOT_ID_FILE = "/proc/sys/kernel/random/boot_id"
+
+# Raw PKCS7 request format: signature as the body, remaining fields as headers.
+# Falls back to a JSON body when a field cannot be sent as a header.
+PKCS7_SIGNATURE_CONTENT_TYPE = "application/pkcs7-signature"
+MAX_HEADER_VALUE_LENGTH = 1024
+
+# The raw PKCS7 format and gzip-compressed bodies need an API version that supports them
+# (GzipRequestDecompressionFilter and the pkcs7-signature endpoint). Older servers reject
+# both with 401, so they are only used when this variable is set to 1/true/yes.
+COMPACT_REQUESTS_ENV_VAR = "OC_API_COMPACT_REQUESTS"
+
+# Spool for --batch / --flush: queued events are delivered together in batch requests
+SPOOL_DIR = "/var/spool/fatal-log"
+SPOOL_QUEUE_FILE = os.path.join(SPOOL_DIR, "queue.jsonl")
+SPOOL_FLUSH_FILE = SPOOL_QUEUE_FILE + ".tmp"  # Events being sent; what is left is kept if sending fails
+SPOOL_REJECTED_FILE = os.path.join(SPOOL_DIR, "rejected.jsonl")  # Events the server refused, kept for inspection
+SPOOL_LOCK_FILE = os.path.join(SPOOL_DIR, "queue.lock")
+SPOOL_FLUSH_LOCK_FILE = os.path.join(SPOOL_DIR, "flush.lock")
+
+# Batch request limits. The server caps request bodies at 1 MiB, so batches are
+# bounded by event count and by serialized size.
+BATCH_MAX_EVENTS = 32
+BATCH_MAX_BYTES = 256 * 1024
+# Responses rejecting the batch content itself: resending the same events cannot succeed
+BATCH_REJECTED_STATUSES = (400, 413, 422)
+
+# Daemon mode (--daemon): events handed over on a unix socket are coalesced into batch requests
+# Always in RUN_DIR, never the temp-dir fallback, so trigger_fatal_log.sh finds the same socket.
+# RUN_DIR is mode 0700 and the socket 0600, so only the daemon's own user (normally root) can use it.
+DAEMON_SOCKET_FILE = os.path.join(RUN_DIR, "fatal.sock")
+DAEMON_FLUSH_INTERVAL_SECONDS = 0.5
+DAEMON_CLIENT_TIMEOUT = 2  # seconds
+EVENT_FIELDS = ("timestamp", "errorMessage", "source", "context")
+
+# Context fields that do not change during the process (script is the entrypoint, not this module)
+STATIC_CONTEXT = f"script={os.path.basename(sys.argv[0])}, pid={os.getpid()}, python={sys.version.split()[0]}"
+
+# Resolved backend address shared between invocations, so cron-driven runs skip the DNS lookup
+API_ENDPOINT_IP_CACHE_NAME = "api_endpoint_ip"
+API_ENDPOINT_IP_CACHE_TTL_SECONDS = 60
+
+# Shared backend HTTP session, created on first use (see get_session)
+_session = None
+_session_lock = threading.Lock()  # The warm-up thread and the caller may both create it
+
+
+def get_session(endpoint=None):
+    """
+    Return the shared requests session used for the backend calls.
+
+    `requests` is imported here rather than at module load so runs that fail
+    before reaching the backend do not pay for the import. The session keeps
+    the backend connection alive between the warm-up and the fatal log POST.
+
+    Args:
+        endpoint: Backend URL; when the session is created, HTTPS connections to
+                  its host are pinned to the address cached by _resolve_endpoint_ip()
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=4, max_retries=_backend_retry())
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Connection"] = "keep-alive"
+
+            try:
+                parts = urlsplit(endpoint) if endpoint else None
+                if parts and parts.scheme == "https" and parts.hostname \
+                        and not requests.utils.get_environ_proxies(endpoint):
+                    ip = _resolve_endpoint_ip(parts.hostname, parts.port or 443)
+                    if ip:
+                        session.mount(f"https://{parts.netloc}", _pinned_address_adapter(parts.hostname, ip))
+            except ValueError:
+                pass  # Invalid URL (e.g. non-numeric port): no pinning, requests reports the error
+            _session = session
+    return _session
+
+
+def _backend_retry():
+    """
+    Return the urllib3 retry policy for backend requests (see BACKEND_RETRIES).
+
+    Only BACKEND_RETRY_METHODS are retried. urllib3 retries connection errors for
+    every method, so other requests are failed on their first error explicitly.
+    """
+    from urllib3.util.retry import Retry
+
+    class BackendRetry(Retry):
+        def increment(self, method=None, *args, **kwargs):
+            retry = self if method in BACKEND_RETRY_METHODS else self.new(total=0)
+            return super(BackendRetry, retry).increment(method, *args, **kwargs)
+
+    options = dict(
+        total=BACKEND_RETRIES,
+        connect=BACKEND_RETRIES,
+        read=0,
+        status=BACKEND_RETRIES,
+        backoff_factor=BACKEND_RETRY_BACKOFF_FACTOR,
+        status_forcelist=BACKEND_RETRY_STATUSES,
+        respect_retry_after_header=False,
+        raise_on_status=False  # Report the final HTTP status instead of raising
+    )
+    try:
+        return BackendRetry(allowed_methods=BACKEND_RETRY_METHODS, **options)
+    except TypeError:  # urllib3 < 1.26 calls it method_whitelist
+        return BackendRetry(method_whitelist=BACKEND_RETRY_METHODS, **options)
+
+
+def _resolve_endpoint_ip(hostname, port):
+    """
+    Resolve the backend hostname to an IPv4 address, reusing a recent lookup.
+
+    The result is cached in the api_endpoint_ip cache file and re-resolved once the
+    file is older than API_ENDPOINT_IP_CACHE_TTL_SECONDS.
+
+    Returns:
+        IP address string, or None if the hostname cannot be resolved
+    """
+    cache_file = _cache_file(API_ENDPOINT_IP_CACHE_NAME)
+    try:
+        if cache_file and time.time() - os.path.getmtime(cache_file) < API_ENDPOINT_IP_CACHE_TTL_SECONDS:
+            with open(cache_file, 'r') as f:
+                cached = json.load(f)
+            if cached["host"] == hostname:
+                return cached["ip"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # Missing, stale or unreadable cache, resolve again
+
+    try:
+        ip = socket.getaddrinfo(hostname, port, socket.AF_INET, socket.SOCK_STREAM)[0][4][0]
+    except (OSError, IndexError):
+        return None  # Leave name resolution to requests
+    if ip != hostname:
+        _write_cache_file(cache_file, {"host": hostname, "ip": ip})
+    return ip
+
+
+def _pinned_address_adapter(hostname, ip):
+    """
+    Build a transport adapter that connects to `ip` for requests to `hostname`.
+
+    The request URL is rewritten to the IP address while the Host header, TLS SNI
+    and certificate hostname check keep using the original hostname.
+    """
+    from requests.adapters import HTTPAdapter
+
+    class PinnedAddressAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs["server_hostname"] = hostname
+            kwargs["assert_hostname"] = hostname
+            super().init_poolmanager(*args, **kwargs)
+
+        def send(self, request, **kwargs):
+            parts = urlsplit(request.url)
+            if parts.hostname == hostname:
+                request.headers["Host"] = parts.netloc
+                netloc = ip if parts.port is None else f"{ip}:{parts.port}"
+                request.url = urlunsplit(parts._replace(netloc=netloc))
+            return super().send(request, **kwargs)
+
+    return PinnedAddressAdapter(pool_maxsize=4, max_retries=_backend_retry())
+
+
+def _read_cached_imds_token():
+    """
+    Read the IMDSv2 token cached by a previous invocation.
+
+    Returns:
+        Token string, or None if there is no cache or the token is about to expire
+    """
+    cache_file = _cache_file(IMDS_TOKEN_CACHE_NAME)
+    if not cache_file:
+        return None
+    try:
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+        if time.time() < cached["expires_at"] - IMDS_TOKEN_CACHE_SLACK_SECONDS:
+            return cached["token"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # Missing or unreadable cache, fetch a new token
+    return None
+
+
+def _write_cache_file(path, data):
+    """
+    Atomically write a JSON cache file readable only by the current user (mode 0600).
+    Does nothing when `path` is None (caching disabled).
+    """
+    if not path:
+        return
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            'w', dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", delete=False
+        ) as f:
+            tmp_path = f.name
+            os.chmod(tmp_path, 0o600)
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"WARNING: Failed to write cache file {path}: {e}", file=sys.stderr)
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def _write_cached_imds_token(token):
+    """Cache the IMDSv2 token together with its expiry time."""
+    _write_cache_file(_cache_file(IMDS_TOKEN_CACHE_NAME), {"token": token, "expires_at": time.time() + IMDS_TOKEN_TTL_SECONDS})
+
+
+def _clear_cache_file(path):
+    """Remove a cache file, e.g. after its content was rejected."""
+    if not path:
+        return
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _metadata_request(conn, method, path, headers):
+    """
+    Send a request to the metadata service over an existing keep-alive connection.
+
+    Connection errors and throttling/server error responses are retried with
+    exponential backoff. Timeouts are not retried: they have already used the
+    full timeout and usually mean the metadata service is unreachable.
+
+    Returns:
+        Tuple of (HTTP status code, response body string)
+    """
+    for attempt in range(METADATA_RETRIES + 1):
+        last_attempt = attempt == METADATA_RETRIES
+        try:
+            if conn.sock is None:
+                # Connect with the short connect timeout, then allow the longer read timeout
+                conn.connect()
+                conn.sock.settimeout(METADATA_TIMEOUT)
+            conn.request(method, path, headers=headers)
+            response = conn.getresponse()
+            body = response.read().decode("utf-8")
+        except socket.timeout:
+            conn.close()
+            raise
+        except (OSError, http.client.HTTPException):
+            conn.close()  # Leave the connection reusable; it reconnects on the next request
+            if last_attempt:
+                raise
+        else:
+            if response.status not in METADATA_RETRY_STATUSES or last_attempt:
+                return response.status, body
+
+        time.sleep(METADATA_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+
+def get_imds_token(conn, use_env_token=True):
+    """
+    Fetch IMDSv2 session token for secure metadata access.
+    Uses the token from the AWS_EC2_METADATA_TOKEN environment variable if set, otherwise
+    reuses the token cached by a previous invocation while it is still valid.
+
+    Args:
+        conn: http.client.HTTPConnection to the metadata service
+        use_env_token: If False, ignore AWS_EC2_METADATA_TOKEN (e.g. after it was rejected)
+
+    Returns:
+        Token string or None on error
+    """
+    if use_env_token:
+        token = os.environ.get(IMDS_TOKEN_ENV_VAR)
+        if token:
+            return token
+
+    token = _read_cached_imds_token()
+    if token:
+        return token
+
+    try:
+        status, token = _metadata_request(
+            conn,
+            "PUT",
+            IMDS_TOKEN_PATH,
+            {"X-aws-ec2-metadata-token-ttl-seconds": str(IMDS_TOKEN_TTL_SECONDS)}
+        )
+    except (OSError, http.client.HTTPException) as e:
+        print(f"WARNING: Failed to get IMDSv2 token, falling back to IMDSv1: {e}", file=sys.stderr)
+        return None
+    if status != 200:
+        print(f"WARNING: Failed to get IMDSv2 token, falling back to IMDSv1: HTTP {status}", file=sys.stderr)
+        return None
+
+    _write_cached_imds_token(token)
+    return token
+
+
+def _read_boot_id():
+    """Return the kernel boot ID, or None if it is unavailable (e.g. not running on Linux)."""
+    try:
+        with open(BOOT_ID_FILE, 'r') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _read_cached_pkcs7(boot_id):
+    """
+    Read the PKCS7 signature cached during the current boot.
+
+    Returns:
+        PKCS7 signature string, or None if there is no cache for this boot
+    """
+    cache_file = _cache_file(PKCS7_CACHE_NAME)
+    if not boot_id or not cache_file:
+        return None
+    try:
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+        if cached["boot_id"] == boot_id:
+            return cached["pkcs7"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # Missing or unreadable cache, fetch from the metadata service
+    return None
+
+
+def fetch_pkcs7(use_imdsv2=True):
+    """
+    Fetch PKCS7 signature from EC2 metadata service.
+    Uses IMDSv2 for enhanced security, with fallback to IMDSv1.
+    If a cached or AWS_EC2_METADATA_TOKEN token is rejected, the cache is cleared and the
+    fetch retried once with a freshly requested token.
+    The signature is cached per boot, so later invocations skip the metadata service entirely.
+
+    Args:
+        use_imdsv2: If False, skip the IMDSv2 token and query the metadata service with IMDSv1
+
+    Returns:
+        PKCS7 signature string or None on error
+    """
+    boot_id = _read_boot_id()
+    pkcs7_signature = _read_cached_pkcs7(boot_id)
+    if pkcs7_signature:
+        print("Using cached instance identity")
+        return pkcs7_signature
+
+    # One connection serves both the token PUT and the PKCS7 GET
+    conn = http.client.HTTPConnection(IMDS_HOST, IMDS_PORT, timeout=METADATA_CONNECT_TIMEOUT)
+    try:
+        for attempt in range(2):
+            # Get IMDSv2 token (optional, will fallback to IMDSv1 if unavailable)
+            token = get_imds_token(conn, use_env_token=attempt == 0) if use_imdsv2 else None
+            headers = {}
+            if token:
+                headers["X-aws-ec2-metadata-token"] = token
+                print("Using IMDSv2 (secure mode)")
+            else:
+                print("Using IMDSv1 (fallback mode)")
+
+            # Fetch PKCS7 signature
+            status, pkcs7_signature = _metadata_request(conn, "GET", IMDS_PKCS7_PATH, headers)
+            if status == 401 and token and attempt == 0:
+                print("WARNING: IMDSv2 token rejected, fetching a new one", file=sys.stderr)
+                _clear_cache_file(_cache_file(IMDS_TOKEN_CACHE_NAME))
+                continue
+            if status != 200:
+                print(f"ERROR: Failed to fetch EC2 metadata: HTTP {status}", file=sys.stderr)
+                return None
+            if boot_id:
+                _write_cache_file(_cache_file(PKCS7_CACHE_NAME), {"boot_id": boot_id, "pkcs7": pkcs7_signature})
+
+            print("Successfully fetched instance identity")
+            return pkcs7_signature
+
+    except socket.timeout:
+        print("ERROR: Timeout fetching EC2 metadata. Are you running on an EC2 instance?", file=sys.stderr)
+        return None
+    except (OSError, http.client.HTTPException) as e:
+        print(f"ERROR: Failed to fetch EC2 metadata: {e}", file=sys.stderr)
+        return None
+    finally:
+        conn.close()
+
+
+def warm_backend_connection(endpoint):
+    """
+    Open the backend TCP/TLS connection ahead of the fatal log POST.
+
+    Issues a cheap HEAD request against the API origin purely so the pooled
+    connection in the shared session is already established when send()
+    runs. The origin root is used rather than the monitoring path so the warm-up
+    never reaches the EC2 authentication filter. Any failure is ignored.
+    """
+    try:
+        session = get_session(endpoint)
+        parts = urlsplit(endpoint)
+        session.head(f"{parts.scheme}://{parts.netloc}/", timeout=(BACKEND_CONNECT_TIMEOUT, 1))
+    except Exception:
+        pass  # The POST reports any problem with the endpoint
+
+
+def fetch_pkcs7_warming_backend(endpoint):
+    """
+    Fetch the PKCS7 signature while the backend connection is warmed up in the background.
+
+    Does not wait for the warm-up: if the connection is ready by the time of the
+    POST it is reused, otherwise the POST opens its own. The warm-up runs in a
+    daemon thread, so it never delays the process exit either.
+
+    Returns:
+        PKCS7 signature string or None on error
+    """
+    threading.Thread(target=warm_backend_connection, args=(endpoint,), daemon=True).start()
+    return fetch_pkcs7()
+
+
+def utcnow_iso():
+    """Return the current UTC time as an ISO 8601 string, e.g. 2025-11-28T12:00:00Z."""
+    t = time.gmtime()
+    return "%04d-%02d-%02dT%02d:%02d:%02dZ" % (t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec)
+
+
+def build_event(error_message, source_type=None, additional_context=None):
+    """
+    Build the per-event fields of a fatal log request.
+
+    Args:
+        error_message: The error message to log
+        source_type: Optional source type identifier (e.g., 'test', 'manual')
+        additional_context: Optional additional context information
+
+    Returns:
+        Dict with timestamp, errorMessage, source and context
+    """
+    # Determine source identifier
+    if source_type:
+        source = f"trigger-fatal-log/{source_type}"
+    else:
+        source = "trigger-fatal-log"
+
+    # Build context with additional info
+    if additional_context:
+        context = f"{STATIC_CONTEXT}, {additional_context}"
+    else:
+        context = STATIC_CONTEXT
+
+    return {
+        "timestamp": utcnow_iso(),
+        "errorMessage": error_message,
+        "source": source,
+        "context": context
+    }
+
+
+def _compact_requests_enabled():
+    """Check whether OC_API_COMPACT_REQUESTS enables raw PKCS7 bodies and gzip compression."""
+    return os.getenv(COMPACT_REQUESTS_ENV_VAR, "").strip().lower() in ("1", "true", "yes")
+
+
+def _post_to_backend(url, data, headers):
+    """
+    POST a request body to the backend API and report the outcome.
+    With OC_API_COMPACT_REQUESTS enabled the body is gzip-compressed to reduce upload
+    size; the server decompresses it before authentication.
+
+    Returns:
+        HTTP status code, or None if no response was received
+    """
+    session = get_session(url)
+    import requests
+
+    if _compact_requests_enabled():
+        data = gzip.compress(data, compresslevel=1)
+        headers = dict(headers, **{"Content-Encoding": "gzip"})
+
+    try:
+        response = session.post(
+            url,
+            data=data,
+            headers=headers,
+            timeout=(BACKEND_CONNECT_TIMEOUT, BACKEND_READ_TIMEOUT)
+        )
+
+        if response.status_code == 200:
+            print("✓ Fatal log sent successfully")
+            try:
+                result = json_loads(response.content)
+                print(f"  Status: {result.get('status')}")
+                print(f"  Message: {result.get('message')}")
+            except (ValueError, AttributeError):
+                print(f"  Response: {response.text}")
+            return response.status_code
+        else:
+            print(f"✗ Failed to send fatal log: HTTP {response.status_code}", file=sys.stderr)
+            if response.status_code == 401:
+                # Do not keep reusing a signature the backend refused
+                _clear_cache_file(_cache_file(PKCS7_CACHE_NAME))
+            try:
+                error_detail = json_loads(response.content)
+                print(f"  Error: {error_detail.get('message', 'Unknown error')}", file=sys.stderr)
+            except (ValueError, AttributeError):
+                print(f"  Response: {response.text}", file=sys.stderr)
+            return response.status_code
+
+    except requests.exceptions.Timeout:
+        print("✗ Request timeout - backend did not respond in time", file=sys.stderr)
+        return None
+    except requests.exceptions.RequestException as e:
+        print(f"✗ Request failed: {e}", file=sys.stderr)
+        return None
+
+
+def _fits_in_header(value):
+    """Check whether a field can be sent as an HTTP header (printable ASCII, bounded length)."""
+    return len(value) <= MAX_HEADER_VALUE_LENGTH and all(" " <= c <= "~" for c in value)
+
+
+def send(endpoint, error_message, pkcs7, source_type=None, additional_context=None):
+    """
+    Send fatal log request to the backend API.
+
+    Args:
+        endpoint: Fatal log endpoint URL
+        error_message: The error message to log
+        pkcs7: PKCS7 signature (instanceId and document are extracted from this on the server)
+        source_type: Optional source type identifier (e.g., 'test', 'manual')
+        additional_context: Optional additional context information
+
+    Returns:
+        True if successful, False otherwise
+    """
+    # Build request payload matching production format
+    # SECURITY NOTE: We only send the PKCS7 signature and timestamp.
+    # The instanceId and document are extracted from the PKCS7 on the server side.
+    # This prevents tampering with the instance identity.
+    event = build_event(error_message, source_type, additional_context)
+
+    if _compact_requests_enabled() and all(_fits_in_header(value) for value in event.values()):
+        # Send the signature as the raw body, avoiding JSON escaping of the largest field
+        data = pkcs7.encode("ascii")
+        headers = {
+            "Content-Type": PKCS7_SIGNATURE_CONTENT_TYPE,
+            "X-Timestamp": event["timestamp"],
+            "X-Error-Message": event["errorMessage"],
+            "X-Source": event["source"],
+            "X-Context": event["context"]
+        }
+    else:
+        # Fixed-shape payload: only the string values need JSON escaping
+        data = (
+            '{"pkcs7":' + json.dumps(pkcs7)
+            + ',"timestamp":"' + event["timestamp"]
+            + '","errorMessage":' + json.dumps(event["errorMessage"])
+            + ',"source":' + json.dumps(event["source"])
+            + ',"context":' + json.dumps(event["context"])
+            + '}'
+        ).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+
+    print(f"Sending fatal log to {endpoint}...")
+    return _post_to_backend(endpoint, data, headers) == 200
+
+
+@contextmanager
+def _spool_lock(path, blocking=True):
+    """Hold an exclusive flock on a spool lock file for the duration of the block."""
+    import fcntl
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        yield
+    finally:
+        os.close(fd)  # Closing the descriptor releases the lock
+
+
+def _append_to_spool(events):
+    """Append events to the spool queue file (raises OSError on failure)."""
+    os.makedirs(SPOOL_DIR, mode=0o700, exist_ok=True)
+    with _spool_lock(SPOOL_LOCK_FILE):
+        with open(SPOOL_QUEUE_FILE, 'ab') as f:
+            f.writelines(_json_dumps(event) + b"\n" for event in events)
+
+
+def enqueue_fatal_log(error_message, source_type=None, additional_context=None):
+    """
+    Append a fatal log event to the spool instead of sending it (--batch).
+    Queued events are delivered by a later --flush run.
+
+    Returns:
+        True if the event was queued, False otherwise
+    """
+    event = build_event(error_message, source_type, additional_context)
+    try:
+        _append_to_spool([event])
+    except OSError as e:
+        print(f"✗ Failed to queue fatal log: {e}", file=sys.stderr)
+        return False
+
+    print(f"✓ Fatal log queued in {SPOOL_QUEUE_FILE}")
+    return True
+
+
+def _take_spooled_events():
+    """
+    Move the queued events aside and read them back.
+
+    New events can be queued while the batch is being sent. Events left behind by
+    a previous failed flush are kept and included in this batch.
+
+    Returns:
+        List of event dicts (empty if nothing is queued)
+    """
+    with _spool_lock(SPOOL_LOCK_FILE):
+        try:
+            if os.path.exists(SPOOL_FLUSH_FILE):
+                with open(SPOOL_QUEUE_FILE, 'r') as src, open(SPOOL_FLUSH_FILE, 'a') as dst:
+                    dst.write(src.read())
+                os.unlink(SPOOL_QUEUE_FILE)
+            else:
+                os.rename(SPOOL_QUEUE_FILE, SPOOL_FLUSH_FILE)
+        except FileNotFoundError:
+            pass  # Nothing newly queued
+
+    events = []
+    malformed = []
+    try:
+        with open(SPOOL_FLUSH_FILE, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json_loads(line)
+                except ValueError:
+                    event = None
+                if _is_valid_event(event):
+                    events.append(event)
+                else:
+                    malformed.append(line)
+    except FileNotFoundError:
+        pass
+    if malformed:
+        _quarantine(malformed, "malformed queued events")
+        _write_flush_file(events)  # So a failed flush does not quarantine them again
+    return events
+
+
+def _is_valid_event(event):
+    """Check that an event is a JSON object whose known fields are strings (or missing)."""
+    return isinstance(event, dict) and all(
+        event.get(field) is None or isinstance(event.get(field), str) for field in EVENT_FIELDS
+    )
+
+
+def _quarantine(lines, reason):
+    """Append serialized events the server will never accept to SPOOL_REJECTED_FILE."""
+    with _spool_lock(SPOOL_LOCK_FILE):
+        with open(SPOOL_REJECTED_FILE, 'ab') as f:
+            f.writelines(line + b"\n" for line in lines)
+    print(f"WARNING: Moved {len(lines)} fatal logs to {SPOOL_REJECTED_FILE} ({reason})", file=sys.stderr)
+
+
+def _chunk_events(events):
+    """Split events into batches of at most BATCH_MAX_EVENTS events and BATCH_MAX_BYTES serialized."""
+    chunk, size = [], 0
+    for event in events:
+        event_size = len(_json_dumps(event))
+        if chunk and (len(chunk) >= BATCH_MAX_EVENTS or size + event_size > BATCH_MAX_BYTES):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(event)
+        size += event_size
+    if chunk:
+        yield chunk
+
+
+def _write_flush_file(events):
+    """Replace the events being flushed with those not yet delivered."""
+    if not events:
+        _clear_cache_file(SPOOL_FLUSH_FILE)
+        return
+    tmp_path = SPOOL_FLUSH_FILE + ".new"
+    with open(tmp_path, 'wb') as f:
+        f.writelines(_json_dumps(event) + b"\n" for event in events)
+    os.replace(tmp_path, SPOOL_FLUSH_FILE)
+
+
+def _send_batch(endpoint, events, pkcs7):
+    """
+    Send events to the batch endpoint (the fatal log endpoint with "/batch" appended).
+
+    Returns:
+        HTTP status code, or None if no response was received
+    """
+    payload = {
+        "pkcs7": pkcs7,
+        "timestamp": utcnow_iso(),
+        "events": events
+    }
+    batch_endpoint = endpoint.rstrip("/") + "/batch"
+    print(f"Sending {len(events)} fatal logs to {batch_endpoint}...")
+    data = _json_dumps(payload)
+    return _post_to_backend(batch_endpoint, data, {"Content-Type": "application/json"})
+
+
+def _send_spooled_events(endpoint):
+    """
+    Send the queued events in bounded batches, dropping each batch from the spool once accepted.
+
+    Sending stops at the first batch that fails, keeping it and the rest for the next
+    flush. Batches the server rejects as invalid (BATCH_REJECTED_STATUSES) are moved
+    to SPOOL_REJECTED_FILE instead, so they cannot hold up the rest of the queue.
+
+    Returns:
+        True if every valid queued event was delivered, False otherwise
+    """
+    events = _take_spooled_events()
+    if not events:
+        print("No queued fatal logs to send")
+        _clear_cache_file(SPOOL_FLUSH_FILE)
+        return True
+
+    pkcs7 = fetch_pkcs7_warming_backend(endpoint)
+    if not pkcs7:
+        print("✗ Failed to fetch instance identity, queued fatal logs kept", file=sys.stderr)
+        return False
+
+    remaining = events
+    rejected = 0
+    for chunk in _chunk_events(events):
+        status = _send_batch(endpoint, chunk, pkcs7)
+        if status in BATCH_REJECTED_STATUSES:
+            _quarantine([_json_dumps(event) for event in chunk], f"rejected with HTTP {status}")
+            rejected += len(chunk)
+        elif status != 200:
+            print(f"  {len(remaining)} queued fatal logs kept for the next flush", file=sys.stderr)
+            return False
+        remaining = remaining[len(chunk):]
+        _write_flush_file(remaining)
+
+    return rejected == 0
+
+
+def flush_spooled_fatal_logs(endpoint):
+    """
+    Send all queued fatal log events to the batch endpoint (--flush).
+    The batch endpoint is the fatal log endpoint with "/batch" appended.
+    The PKCS7 signature is fetched once for all batches. Events that could not be
+    sent stay in the spool and are retried by the next flush.
+
+    Returns:
+        True if the queue was delivered (or empty), False otherwise
+    """
+    try:
+        os.makedirs(SPOOL_DIR, mode=0o700, exist_ok=True)
+        with _spool_lock(SPOOL_FLUSH_LOCK_FILE, blocking=False):
+            return _send_spooled_events(endpoint)
+    except BlockingIOError:
+        print("Another flush is already in progress, skipping")
+        return True
+    except OSError as e:
+        print(f"✗ Failed to flush queued fatal logs: {e}", file=sys.stderr)
+        return False
+
+
+def hand_off_to_daemon(error_message, source_type=None, additional_context=None):
+    """
+    Pass a fatal log event to a running --daemon over its unix socket.
+    Only works when the caller runs as the same user as the daemon (normally root);
+    other callers cannot reach the socket and send the event themselves.
+
+    Returns:
+        True if the daemon accepted the event, False if no daemon is reachable
+    """
+    try:
+        st = os.lstat(DAEMON_SOCKET_FILE)
+    except OSError:
+        return False
+    # Only hand events to a daemon run by the current user
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        return False
+
+    event = build_event(error_message, source_type, additional_context)
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(DAEMON_CLIENT_TIMEOUT)
+            sock.connect(DAEMON_SOCKET_FILE)
+            sock.sendall(_json_dumps(event) + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+            accepted = sock.recv(16).startswith(b"ok")
+    except OSError:
+        return False
+
+    if accepted:
+        print(f"✓ Fatal log handed to the daemon on {DAEMON_SOCKET_FILE}")
+    return accepted
+
+
+class _EventCoalescer:
+    """Buffers events received by the daemon and sends them in batches."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self._events = []
+        self._cond = threading.Condition()
+        self._stopping = threading.Event()
+
+    def add(self, events):
+        with self._cond:
+            self._events.extend(events)
+            if len(self._events) >= BATCH_MAX_EVENTS:
+                self._cond.notify()
+
+    def stop(self, *_):
+        self._stopping.set()
+
+    def run(self):
+        """Send a batch every DAEMON_FLUSH_INTERVAL_SECONDS, or sooner once it is full, until stopped."""
+        while not self._stopping.is_set():
+            with self._cond:
+                if len(self._events) < BATCH_MAX_EVENTS:
+                    self._cond.wait(DAEMON_FLUSH_INTERVAL_SECONDS)
+                batch = self._take_batch()
+            if batch:
+                self._deliver(batch)
+
+    def flush(self):
+        """Send everything still buffered."""
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._deliver(batch)
+
+    def _take_batch(self):
+        batch = self._events[:BATCH_MAX_EVENTS]
+        del self._events[:BATCH_MAX_EVENTS]
+        return batch
+
+    def _deliver(self, events):
+        """
+        Send a batch, moving what was not delivered to the spool for a later --flush.
+        Chunks the server rejects as invalid are quarantined like in --flush.
+        """
+        undelivered = events
+        try:
+            pkcs7 = fetch_pkcs7()
+            for chunk in _chunk_events(events) if pkcs7 else ():
+                status = _send_batch(self.endpoint, chunk, pkcs7)
+                if status in BATCH_REJECTED_STATUSES:
+                    _quarantine([_json_dumps(event) for event in chunk], f"HTTP {status}")
+                elif status != 200:
+                    break
+                undelivered = undelivered[len(chunk):]
+        except Exception as e:  # One bad batch or response must not stop the daemon
+            print(f"✗ Failed to send {len(undelivered)} fatal logs: {e!r}", file=sys.stderr)
+        if not undelivered:
+            return
+        try:
+            _append_to_spool(undelivered)
+            print(f"  {len(undelivered)} fatal logs kept in {SPOOL_QUEUE_FILE} for the next flush", file=sys.stderr)
+        except OSError as e:
+            print(f"✗ Failed to queue {len(undelivered)} undelivered fatal logs: {e}", file=sys.stderr)
+
+
+def _daemon_server(path, coalescer):
+    """
+    Create the unix socket server for the daemon, feeding received events to `coalescer`.
+
+    The server classes are defined here so socketserver is only imported by --daemon.
+    """
+    import socketserver
+
+    class DaemonRequestHandler(socketserver.StreamRequestHandler):
+        """
+        Reads one JSON event line from a client and acknowledges it with "ok".
+
+        One event per connection means clients such as `nc -U` get their reply and
+        the connection closed without needing to half-close the socket first.
+        """
+
+        timeout = DAEMON_CLIENT_TIMEOUT
+
+        def handle(self):
+            try:
+                event = json.loads(self.rfile.readline())
+                if not _is_valid_event(event):
+                    raise ValueError("event is not a JSON object with string fields")
+            except (OSError, ValueError) as e:
+                print(f"WARNING: Rejected malformed daemon request: {e}", file=sys.stderr)
+                return
+
+            coalescer.add([{field: event.get(field) for field in EVENT_FIELDS}])
+            try:
+                self.wfile.write(b"ok\n")
+            except OSError:
+                pass  # Client gave up waiting; the event is queued regardless
+
+    class DaemonServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+        request_queue_size = 128  # Accept bursts of clients connecting at once
+
+    return DaemonServer(path, DaemonRequestHandler)
+
+
+def run_daemon(endpoint):
+    """
+    Run the fatal log daemon (--daemon) until SIGTERM or SIGINT.
+
+    Listens on DAEMON_SOCKET_FILE for events handed over by hand_off_to_daemon()
+    or trigger_fatal_log.sh and sends them to the batch endpoint, so a burst of
+    fatal logs costs one request per BATCH_MAX_EVENTS events instead of one
+    process and request each. The PKCS7 signature is read from its per-boot cache
+    for every batch. Batches that cannot be sent are moved to the --batch spool
+    for a later --flush. Refuses to start unless RUN_DIR is owned by the current
+    user, so the socket is always where the clients look for it.
+
+    Returns:
+        True after a clean shutdown, False if the daemon could not start
+    """
+    if _cache_dir() != RUN_DIR:
+        print(f"✗ --daemon needs {RUN_DIR} to be owned by the current user (run it as root)", file=sys.stderr)
+        return False
+
+    if os.path.exists(DAEMON_SOCKET_FILE):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(DAEMON_SOCKET_FILE)
+            print(f"✗ A daemon is already listening on {DAEMON_SOCKET_FILE}", file=sys.stderr)
+            return False
+        except OSError:
+            _clear_cache_file(DAEMON_SOCKET_FILE)  # Left behind by a daemon that did not shut down cleanly
+
+    coalescer = _EventCoalescer(endpoint)
+    try:
+        server = _daemon_server(DAEMON_SOCKET_FILE, coalescer)
+        os.chmod(DAEMON_SOCKET_FILE, 0o600)
+    except OSError as e:
+        print(f"✗ Failed to listen on {DAEMON_SOCKET_FILE}: {e}", file=sys.stderr)
+        return False
+
+    import signal
+    signal.signal(signal.SIGTERM, coalescer.stop)
+    signal.signal(signal.SIGINT, coalescer.stop)
+
+    # Cache the signature and open the backend connection before the first batch
+    fetch_pkcs7_warming_backend(endpoint)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Listening for fatal logs on {DAEMON_SOCKET_FILE}")
+    try:
+        coalescer.run()
+    finally:
+        server.shutdown()
+        server.server_close()
+        _clear_cache_file(DAEMON_SOCKET_FILE)
+        coalescer.flush()
+    print("Daemon stopped")
+    return True
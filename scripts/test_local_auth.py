@@ -17,21 +17,46 @@ Usage:
 
 Requirements:
     pip3 install requests
+    pip3 install orjson  # optional, faster response parsing
 
 Note:
     - Auth filter is only active with edge or prod profiles
     - Local testing requires SPRING_PROFILES_ACTIVE=edge ./gradlew bootRun
     - EC2 identity validation requires real PKCS7 signatures from EC2 metadata service
+    - --use-ec2-metadata shares the IMDS token and PKCS7 caches with trigger_fatal_log.py
+      (/var/run/imos, or a per-user directory under the temp dir)
 """
 
+import argparse
 import sys
-import requests
+import os
 import json
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _fatal_log_client import fetch_pkcs7, json_loads, utcnow_iso
 
 # Configuration
 LOCAL_URL = 'http://localhost:8080/api/v1/monitoring/fatal-log'
-EC2_METADATA_URL = 'http://169.254.169.254/latest/dynamic/instance-identity'
+
+# Shared session so every test request reuses the same pooled connection (see get_session)
+_session = None
+
+
+def get_session():
+    """
+    Return the shared requests session, creating it on first use.
+
+    `requests` is imported here rather than at module load to keep startup cheap.
+    """
+    global _session
+    if _session is None:
+        import requests
+
+        _session = requests.Session()
+        _session.headers.update({'Content-Type': 'application/json'})
+    return _session
 
 
 def fetch_ec2_identity(use_ec2_metadata=False):
@@ -55,39 +80,16 @@ def fetch_ec2_identity(use_ec2_metadata=False):
         return None
 
     print("ℹ️  Fetching EC2 identity from metadata service...")
-
-    try:
-        # Fetch PKCS7 signature
-        sig_response = requests.get(
-            f'{EC2_METADATA_URL}/pkcs7',
-            timeout=2,
-            headers={'User-Agent': 'aws-cli/2.0'}
-        )
-
-        if sig_response.status_code != 200:
-            print(f"❌ Failed to fetch PKCS7 signature: {sig_response.status_code}")
-            return None
-
-        pkcs7_signature = sig_response.text.strip()
-        return pkcs7_signature
-
-    except requests.exceptions.Timeout:
-        print("❌ Timeout fetching EC2 metadata (not running on EC2)")
-        return None
-    except requests.exceptions.ConnectionError:
-        print("❌ Cannot connect to EC2 metadata service (not running on EC2)")
-        return None
-    except Exception as e:
-        print(f"❌ Error fetching EC2 identity: {e}")
-        return None
+    return fetch_pkcs7()
 
 
 def test_without_auth():
     """Test endpoint without authentication (should be rejected on edge/prod)."""
     print("\n1. Testing without authentication:")
+    import requests
 
     try:
-        response = requests.post(
+        response = get_session().post(
             LOCAL_URL,
             json={"errorMessage": "Test without auth"},
             timeout=10
@@ -103,7 +105,7 @@ def test_without_auth():
             print("      Example: SPRING_PROFILES_ACTIVE=edge ./gradlew bootRun")
             return False
 
-    except Exception as e:
+    except (requests.exceptions.RequestException, OSError) as e:
         print(f"   ❌ Error: {e}")
         print("      Is the app running? Try: SPRING_PROFILES_ACTIVE=edge ./gradlew bootRun")
         return False
@@ -119,17 +121,17 @@ def test_with_ec2_identity(pkcs7_signature):
     # This prevents tampering with the instance identity.
     request_body = {
         "pkcs7": pkcs7_signature,
-        "timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "timestamp": utcnow_iso(),
         "errorMessage": "Local EC2 identity test"
     }
 
     print(f"   PKCS7 signature size: {len(pkcs7_signature)} bytes")
+    import requests
 
     try:
-        response = requests.post(
+        response = get_session().post(
             LOCAL_URL,
             json=request_body,
-            headers={'Content-Type': 'application/json'},
             timeout=10
         )
 
@@ -138,20 +140,20 @@ def test_with_ec2_identity(pkcs7_signature):
         if response.status_code == 200:
             print("   ✅ Authentication successful!")
             try:
-                print(f"\n   Response: {json.dumps(response.json(), indent=4)}")
-            except:
+                print(f"\n   Response: {json.dumps(json_loads(response.content), indent=4)}")
+            except ValueError:
                 print(f"   Response: {response.text}")
             return True
         else:
             print(f"   ❌ Authentication failed")
             try:
-                error_data = response.json()
+                error_data = json_loads(response.content)
                 print(f"   Error: {error_data.get('message', error_data.get('error', response.text))}")
-            except:
+            except (ValueError, AttributeError):
                 print(f"   Error: {response.text}")
             return False
 
-    except Exception as e:
+    except (requests.exceptions.RequestException, OSError) as e:
         print(f"   ❌ Error: {e}")
         return False
 
@@ -160,34 +162,38 @@ def test_with_missing_fields():
     """Test endpoint with missing required fields."""
     print("\n3. Testing with missing required fields:")
 
+    timestamp = utcnow_iso()
     test_cases = [
         {
             "name": "Missing pkcs7",
             "body": {
-                "timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "timestamp": timestamp,
                 "errorMessage": "Test"
             }
         }
     ]
 
-    all_passed = True
-    for test_case in test_cases:
+    import requests
+
+    def post_test_case(test_case):
         try:
-            response = requests.post(
-                LOCAL_URL,
-                json=test_case["body"],
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
-
-            if response.status_code == 401:
-                print(f"   ✅ {test_case['name']}: Rejected (expected)")
-            else:
-                print(f"   ❌ {test_case['name']}: Status {response.status_code} (expected 401)")
-                all_passed = False
-
-        except Exception as e:
-            print(f"   ❌ {test_case['name']}: Error {e}")
+            return get_session().post(LOCAL_URL, json=test_case["body"], timeout=10), None
+        except (requests.exceptions.RequestException, OSError) as e:
+            return None, e
+
+    # Send all test cases concurrently; results are reported in test case order
+    with ThreadPoolExecutor(max_workers=min(8, len(test_cases))) as executor:
+        results = list(executor.map(post_test_case, test_cases))
+
+    all_passed = True
+    for test_case, (response, error) in zip(test_cases, results):
+        if error is not None:
+            print(f"   ❌ {test_case['name']}: Error {error}")
+            all_passed = False
+        elif response.status_code == 401:
+            print(f"   ✅ {test_case['name']}: Rejected (expected)")
+        else:
+            print(f"   ❌ {test_case['name']}: Status {response.status_code} (expected 401)")
             all_passed = False
 
     return all_passed
@@ -195,6 +201,10 @@ def test_with_missing_fields():
 
 def main():
     """Run all authentication tests."""
+    parser = argparse.ArgumentParser(description="Test EC2 instance identity authentication of the monitoring endpoint.")
+    parser.add_argument("--use-ec2-metadata", action="store_true",
+                        help="fetch a real PKCS7 signature from the EC2 metadata service")
+    use_ec2_metadata = parser.parse_args().use_ec2_metadata
 
     print("=" * 70)
     print("EC2 Instance Identity Authentication Test")
@@ -202,24 +212,26 @@ def main():
     print("\nThis script tests EC2 instance identity PKCS7 signature")
     print("validation for the monitoring endpoint.\n")
 
-    use_ec2_metadata = '--use-ec2-metadata' in sys.argv
-
-    # Test 1: No authentication
-    auth_enforcement_passed = test_without_auth()
-
-    # Test 2: With EC2 identity
-    print("\n2. Testing with EC2 instance identity + PKCS7 signature:")
-    pkcs7_signature = fetch_ec2_identity(use_ec2_metadata=use_ec2_metadata)
+    try:
+        # Test 1: No authentication
+        auth_enforcement_passed = test_without_auth()
 
-    if pkcs7_signature:
-        ec2_validation_passed = test_with_ec2_identity(pkcs7_signature)
-    else:
-        print("   Note: PKCS7 signatures must be real and cryptographically valid")
-        print("   - Use --use-ec2-metadata flag to test on EC2 instance")
-        ec2_validation_passed = None  # Not tested
+        # Test 2: With EC2 identity
+        print("\n2. Testing with EC2 instance identity + PKCS7 signature:")
+        pkcs7_signature = fetch_ec2_identity(use_ec2_metadata=use_ec2_metadata)
 
-    # Test 3: Missing fields
-    fields_validation_passed = test_with_missing_fields()
+        if pkcs7_signature:
+            ec2_validation_passed = test_with_ec2_identity(pkcs7_signature)
+        else:
+            print("   Note: PKCS7 signatures must be real and cryptographically valid")
+            print("   - Use --use-ec2-metadata flag to test on EC2 instance")
+            ec2_validation_passed = None  # Not tested
+
+        # Test 3: Missing fields
+        fields_validation_passed = test_with_missing_fields()
+    finally:
+        if _session is not None:
+            _session.close()
 
     # Summary
     print("\n" + "=" * 70)
@@ -0,0 +1,59 @@
+#!/usr/bin/env bash
+#
+# EC2 Instance Fatal Log Trigger (daemon client)
+#
+# Hands a fatal log event to a running `trigger_fatal_log.py --daemon` over its
+# unix socket, skipping the Python start-up, metadata service and backend calls.
+# Falls back to trigger_fatal_log.py when the daemon is not reachable or jq/nc
+# are not installed, so it can be used in place of the Python script.
+# Only callers running as the daemon's user (normally root) can use the socket;
+# everyone else always takes the fallback.
+#
+# Usage:
+#     trigger_fatal_log.sh "Error message" [source_type] [additional_context]
+#
+# Requirements:
+#     - jq and an nc with unix socket support (-U), e.g. netcat-openbsd
+#     - trigger_fatal_log.py and _fatal_log_client.py in the same directory (fallback)
+
+FATAL_LOG_SOCKET="/var/run/imos/fatal.sock"  # DAEMON_SOCKET_FILE in _fatal_log_client.py
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+fallback() {
+    exec python3 "${SCRIPT_DIR}/trigger_fatal_log.py" "$@"
+}
+
+if [ $# -lt 1 ] || [ -z "$1" ] || [ ! -S "$FATAL_LOG_SOCKET" ] \
+        || ! command -v jq >/dev/null 2>&1 || ! command -v nc >/dev/null 2>&1; then
+    fallback "$@"
+fi
+
+# Only hand events to a daemon run by the current user
+if [ ! -O "$FATAL_LOG_SOCKET" ]; then
+    fallback "$@"
+fi
+
+source="trigger-fatal-log"
+if [ -n "$2" ]; then
+    source="trigger-fatal-log/$2"
+fi
+context="script=$(basename "$0"), pid=$$"
+if [ -n "$3" ]; then
+    context="${context}, $3"
+fi
+
+event="$(jq -cn \
+    --arg timestamp "$(date -u +%Y-%m-%dT%H:%M:%SZ)" \
+    --arg errorMessage "$1" \
+    --arg source "$source" \
+    --arg context "$context" \
+    '{timestamp: $timestamp, errorMessage: $errorMessage, source: $source, context: $context}')" || fallback "$@"
+
+# The daemon reads one event per connection, replies "ok" and closes the connection
+reply="$(printf '%s\n' "$event" | nc -U -w 2 "$FATAL_LOG_SOCKET" 2>/dev/null)"
+if [ "$reply" = "ok" ]; then
+    echo "✓ Fatal log handed to the daemon on ${FATAL_LOG_SOCKET}"
+    exit 0
+fi
+
+fallback "$@"
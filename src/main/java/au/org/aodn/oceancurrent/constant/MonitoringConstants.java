@@ -0,0 +1,19 @@
+package au.org.aodn.oceancurrent.constant;
+
+/**
+ * Wire format of the raw PKCS7 variant of the fatal-log request.
+ * The PKCS7 signature is sent as the request body and the remaining
+ * MonitoringRequest fields are carried in these headers.
+ */
+public final class MonitoringConstants {
+    public static final String PKCS7_SIGNATURE_MEDIA_TYPE = "application/pkcs7-signature";
+
+    public static final String TIMESTAMP_HEADER = "X-Timestamp";
+    public static final String ERROR_MESSAGE_HEADER = "X-Error-Message";
+    public static final String SOURCE_HEADER = "X-Source";
+    public static final String CONTEXT_HEADER = "X-Context";
+
+    private MonitoringConstants() {
+        throw new AssertionError("Utility class - do not instantiate");
+    }
+}
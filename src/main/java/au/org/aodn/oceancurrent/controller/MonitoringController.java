@@ -1,5 +1,9 @@
 package au.org.aodn.oceancurrent.controller;
 
+import au.org.aodn.oceancurrent.constant.MonitoringConstants;
+import au.org.aodn.oceancurrent.dto.MonitoringBatchRequest;
+import au.org.aodn.oceancurrent.dto.MonitoringBatchResponse;
+import au.org.aodn.oceancurrent.dto.MonitoringEvent;
 import au.org.aodn.oceancurrent.dto.MonitoringRequest;
 import au.org.aodn.oceancurrent.dto.MonitoringResponse;
 import io.swagger.v3.oas.annotations.Operation;
@@ -10,10 +14,13 @@ import lombok.extern.slf4j.Slf4j;
 import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.PostMapping;
 import org.springframework.web.bind.annotation.RequestBody;
+import org.springframework.web.bind.annotation.RequestHeader;
 import org.springframework.web.bind.annotation.RequestMapping;
 import org.springframework.web.bind.annotation.RestController;
 
 import java.time.Instant;
+import java.util.ArrayList;
+import java.util.List;
 
 /**
  * Controller for internal monitoring and health check endpoints.
@@ -44,24 +51,10 @@ public class MonitoringController {
 
         Instant timestamp = Instant.now();
 
-        String errorMessage;
-        if (request != null && request.getErrorMessage() != null && !request.getErrorMessage().trim().isEmpty()) {
-            errorMessage = request.getErrorMessage();
-        } else {
-            errorMessage = "Monitoring health check endpoint triggered";
-        }
-
-        StringBuilder logContext = new StringBuilder();
-        logContext.append(errorMessage);
-
-        if (request != null) {
-            if (request.getSource() != null && !request.getSource().trim().isEmpty()) {
-                logContext.append(" [source=").append(request.getSource()).append("]");
-            }
-            if (request.getContext() != null && !request.getContext().trim().isEmpty()) {
-                logContext.append(" [context=").append(request.getContext()).append("]");
-            }
-        }
+        String errorMessage = resolveErrorMessage(request != null ? request.getErrorMessage() : null);
+        String logContext = request != null
+                ? buildLogContext(errorMessage, request.getSource(), request.getContext())
+                : errorMessage;
 
         // Generate fatal log that will be caught by NewRelic monitoring
         log.error("[FATAL] Monitoring log triggered at {} with message: {}", timestamp, logContext);
@@ -71,11 +64,102 @@ public class MonitoringController {
                 .message("Fatal log generated successfully for monitoring purposes")
                 .timestamp(timestamp.toString())
                 .logLevel("FATAL")
-                .loggedError(logContext.toString())
+                .loggedError(logContext)
                 .build();
 
         log.info("Monitoring endpoint called successfully at {} with message: {}", timestamp, errorMessage);
 
         return ResponseEntity.ok(response);
     }
+
+    @PostMapping(value = "/fatal-log", consumes = MonitoringConstants.PKCS7_SIGNATURE_MEDIA_TYPE)
+    @Operation(
+            summary = "Generate a fatal log entry for monitoring (raw PKCS7 body)",
+            description = "Same as the JSON fatal-log request, but the PKCS7 signature is sent as the raw request body " +
+                    "with Content-Type " + MonitoringConstants.PKCS7_SIGNATURE_MEDIA_TYPE + ". The timestamp, error message, " +
+                    "source and context are passed in the X-Timestamp, X-Error-Message, X-Source and X-Context headers. " +
+                    "In production/edge environments, requires EC2 instance authentication."
+    )
+    @ApiResponses(value = {
+            @ApiResponse(responseCode = "200", description = "Fatal log generated successfully"),
+            @ApiResponse(responseCode = "401", description = "Unauthorised - EC2 instance authentication required (prod/edge only)")
+    })
+    public ResponseEntity<MonitoringResponse> triggerFatalLogWithPkcs7Body(
+            @RequestBody(required = false) String pkcs7,
+            @RequestHeader(value = MonitoringConstants.TIMESTAMP_HEADER, required = false) String timestamp,
+            @RequestHeader(value = MonitoringConstants.ERROR_MESSAGE_HEADER, required = false) String errorMessage,
+            @RequestHeader(value = MonitoringConstants.SOURCE_HEADER, required = false) String source,
+            @RequestHeader(value = MonitoringConstants.CONTEXT_HEADER, required = false) String context) {
+
+        return triggerFatalLog(new MonitoringRequest(pkcs7, timestamp, errorMessage, source, context));
+    }
+
+    @PostMapping("/fatal-log/batch")
+    @Operation(
+            summary = "Generate several fatal log entries for monitoring",
+            description = "Logs each event in the request as a separate fatal error, using the same format as the " +
+                    "single fatal-log endpoint. Lets an instance deliver queued events with one request and one " +
+                    "PKCS7 signature. In production/edge environments, requires EC2 instance authentication."
+    )
+    @ApiResponses(value = {
+            @ApiResponse(responseCode = "200", description = "Fatal logs generated successfully"),
+            @ApiResponse(responseCode = "400", description = "Request contains no events"),
+            @ApiResponse(responseCode = "401", description = "Unauthorised - EC2 instance authentication required (prod/edge only)")
+    })
+    public ResponseEntity<MonitoringBatchResponse> triggerFatalLogBatch(
+            @io.swagger.v3.oas.annotations.parameters.RequestBody(description = "Batch of monitoring events to log")
+            @RequestBody MonitoringBatchRequest request) {
+
+        if (request.getEvents() == null || request.getEvents().isEmpty()) {
+            throw new IllegalArgumentException("At least one monitoring event is required");
+        }
+
+        Instant timestamp = Instant.now();
+        List<String> loggedErrors = new ArrayList<>(request.getEvents().size());
+
+        for (MonitoringEvent event : request.getEvents()) {
+            String logContext = buildLogContext(
+                    resolveErrorMessage(event.getErrorMessage()), event.getSource(), event.getContext());
+            if (event.getTimestamp() != null && !event.getTimestamp().trim().isEmpty()) {
+                logContext += " [eventTimestamp=" + event.getTimestamp() + "]";
+            }
+
+            // Generate fatal log that will be caught by NewRelic monitoring
+            log.error("[FATAL] Monitoring log triggered at {} with message: {}", timestamp, logContext);
+            loggedErrors.add(logContext);
+        }
+
+        MonitoringBatchResponse response = MonitoringBatchResponse.builder()
+                .status("success")
+                .message(loggedErrors.size() + " fatal logs generated successfully for monitoring purposes")
+                .timestamp(timestamp.toString())
+                .logLevel("FATAL")
+                .loggedCount(loggedErrors.size())
+                .loggedErrors(loggedErrors)
+                .build();
+
+        log.info("Monitoring batch endpoint called successfully at {} with {} events", timestamp, loggedErrors.size());
+
+        return ResponseEntity.ok(response);
+    }
+
+    private String resolveErrorMessage(String errorMessage) {
+        if (errorMessage != null && !errorMessage.trim().isEmpty()) {
+            return errorMessage;
+        }
+        return "Monitoring health check endpoint triggered";
+    }
+
+    private String buildLogContext(String errorMessage, String source, String context) {
+        StringBuilder logContext = new StringBuilder();
+        logContext.append(errorMessage);
+
+        if (source != null && !source.trim().isEmpty()) {
+            logContext.append(" [source=").append(source).append("]");
+        }
+        if (context != null && !context.trim().isEmpty()) {
+            logContext.append(" [context=").append(context).append("]");
+        }
+        return logContext.toString();
+    }
 }
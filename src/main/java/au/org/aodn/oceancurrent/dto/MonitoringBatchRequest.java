@@ -0,0 +1,42 @@
+package au.org.aodn.oceancurrent.dto;
+
+import io.swagger.v3.oas.annotations.media.Schema;
+import jakarta.validation.constraints.NotBlank;
+import lombok.AllArgsConstructor;
+import lombok.Data;
+import lombok.NoArgsConstructor;
+
+import java.util.List;
+
+/**
+ * Request DTO for the batch monitoring endpoint.
+ * Lets an instance deliver several queued fatal log events with a single PKCS7 signature,
+ * so the signature is verified once per batch instead of once per event.
+ *
+ * SECURITY NOTE: As with {@link MonitoringRequest}, the instanceId and document are
+ * extracted from the PKCS7 signature rather than accepted from the request body.
+ */
+@Data
+@NoArgsConstructor
+@AllArgsConstructor
+@Schema(description = "Request body for batch monitoring endpoint to generate several fatal logs at once")
+public class MonitoringBatchRequest {
+
+    @Schema(
+            description = "PKCS7 signature of the instance identity document from EC2 metadata service. " +
+                    "Fetch from: http://169.254.169.254/latest/dynamic/instance-identity/pkcs7",
+            example = "MIAGCSqGSIb3DQEHAqCAMIACAQExCzAJBgUrDgMCGgUAMIAGCSqGSIb3DQEHAaCAJIAEggHc...",
+            requiredMode = Schema.RequiredMode.REQUIRED
+    )
+    @NotBlank(message = "PKCS7 signature is required")
+    private String pkcs7;
+
+    @Schema(
+            description = "Timestamp when the batch request was created (ISO 8601 format)",
+            example = "2025-11-28T12:00:00Z"
+    )
+    private String timestamp;
+
+    @Schema(description = "Fatal log events to be logged", requiredMode = Schema.RequiredMode.REQUIRED)
+    private List<MonitoringEvent> events;
+}
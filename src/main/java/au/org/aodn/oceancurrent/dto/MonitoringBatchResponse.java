@@ -0,0 +1,35 @@
+package au.org.aodn.oceancurrent.dto;
+
+import io.swagger.v3.oas.annotations.media.Schema;
+import lombok.AllArgsConstructor;
+import lombok.Builder;
+import lombok.Data;
+import lombok.NoArgsConstructor;
+
+import java.util.List;
+
+@Data
+@Builder
+@NoArgsConstructor
+@AllArgsConstructor
+@Schema(description = "Response from batch monitoring endpoint")
+public class MonitoringBatchResponse {
+
+    @Schema(description = "Status of the operation", example = "success")
+    private String status;
+
+    @Schema(description = "Response message", example = "2 fatal logs generated successfully for monitoring purposes")
+    private String message;
+
+    @Schema(description = "Timestamp of the log entries", example = "2025-11-26T12:34:56.789Z")
+    private String timestamp;
+
+    @Schema(description = "Log level used", example = "FATAL")
+    private String logLevel;
+
+    @Schema(description = "Number of events that were logged", example = "2")
+    private int loggedCount;
+
+    @Schema(description = "The error messages that were logged, in request order")
+    private List<String> loggedErrors;
+}
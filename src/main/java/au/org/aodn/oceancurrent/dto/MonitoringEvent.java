@@ -0,0 +1,42 @@
+package au.org.aodn.oceancurrent.dto;
+
+import io.swagger.v3.oas.annotations.media.Schema;
+import lombok.AllArgsConstructor;
+import lombok.Data;
+import lombok.NoArgsConstructor;
+
+/**
+ * A single fatal log event within a batch monitoring request.
+ * Carries the same optional fields as {@link MonitoringRequest}, without the PKCS7 signature
+ * which is sent once for the whole batch.
+ */
+@Data
+@NoArgsConstructor
+@AllArgsConstructor
+@Schema(description = "A single fatal log event within a batch monitoring request")
+public class MonitoringEvent {
+
+    @Schema(
+            description = "Timestamp when the event was recorded on the instance (ISO 8601 format)",
+            example = "2025-11-28T11:58:30Z"
+    )
+    private String timestamp;
+
+    @Schema(
+            description = "Custom error message to be logged. If empty or null, a default message will be used.",
+            example = "Cron job failed: file scan timeout while generating JSON index"
+    )
+    private String errorMessage;
+
+    @Schema(
+            description = "Optional source identifier (e.g., script name, job name)",
+            example = "daily-data-sync-job"
+    )
+    private String source;
+
+    @Schema(
+            description = "Optional additional context or metadata",
+            example = "exit_code=1, last_run=2025-11-26T12:00:00Z"
+    )
+    private String context;
+}
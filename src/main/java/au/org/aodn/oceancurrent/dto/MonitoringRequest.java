@@ -1,5 +1,6 @@
 package au.org.aodn.oceancurrent.dto;
 
+import com.fasterxml.jackson.annotation.JsonIgnoreProperties;
 import io.swagger.v3.oas.annotations.media.Schema;
 import jakarta.validation.constraints.NotBlank;
 import lombok.AllArgsConstructor;
@@ -12,8 +13,12 @@ import lombok.NoArgsConstructor;
  *
  * SECURITY NOTE: The instanceId and document are NOT accepted from the request body.
  * They are extracted from the PKCS7 signature to prevent tampering.
+ *
+ * Unknown properties are ignored so the authentication filter can also read the
+ * pkcs7 and timestamp fields from a {@link MonitoringBatchRequest} body.
  */
 @Data
+@JsonIgnoreProperties(ignoreUnknown = true)
 @NoArgsConstructor
 @AllArgsConstructor
 @Schema(description = "Request body for monitoring endpoint to generate fatal logs")
@@ -26,6 +26,24 @@ public class CachedBodyHttpServletRequest extends HttpServletRequestWrapper {
         this.cachedBody = StreamUtils.copyToByteArray(request.getInputStream());
     }
 
+    /**
+     * Wraps the request with a body that has already been read, e.g. after decompressing it.
+     */
+    public CachedBodyHttpServletRequest(HttpServletRequest request, byte[] body) {
+        super(request);
+        this.cachedBody = body;
+    }
+
+    @Override
+    public int getContentLength() {
+        return this.cachedBody.length;
+    }
+
+    @Override
+    public long getContentLengthLong() {
+        return this.cachedBody.length;
+    }
+
     @Override
     public ServletInputStream getInputStream() {
         return new CachedBodyServletInputStream(this.cachedBody);
@@ -1,6 +1,7 @@
 package au.org.aodn.oceancurrent.security;
 
 import au.org.aodn.oceancurrent.configuration.MonitoringSecurityProperties;
+import au.org.aodn.oceancurrent.constant.MonitoringConstants;
 import au.org.aodn.oceancurrent.dto.ErrorResponse;
 import au.org.aodn.oceancurrent.dto.MonitoringRequest;
 import com.fasterxml.jackson.databind.ObjectMapper;
@@ -44,6 +45,8 @@ import java.util.Set;
 public class Ec2InstanceAuthenticationFilter extends OncePerRequestFilter {
 
     private static final String MONITORING_PATH = "/api/v1/monitoring";
+    private static final MediaType PKCS7_SIGNATURE_MEDIA_TYPE =
+            MediaType.parseMediaType(MonitoringConstants.PKCS7_SIGNATURE_MEDIA_TYPE);
 
     private final Ec2InstanceIdentityValidator instanceIdentityValidator;
     private final ObjectMapper objectMapper;
@@ -140,6 +143,8 @@ public class Ec2InstanceAuthenticationFilter extends OncePerRequestFilter {
 
     /**
      * Parse request body into MonitoringRequest DTO.
+     * A body sent as application/pkcs7-signature is the raw PKCS7 signature, with the
+     * remaining fields taken from the X-Timestamp, X-Error-Message, X-Source and X-Context headers.
      * Note: Uses CachedBodyHttpServletRequest which allows multiple reads of the body.
      *
      * @param request the HTTP request (should be a CachedBodyHttpServletRequest)
@@ -148,6 +153,16 @@ public class Ec2InstanceAuthenticationFilter extends OncePerRequestFilter {
      */
     private MonitoringRequest parseMonitoringRequest(CachedBodyHttpServletRequest request) throws IOException {
         String body = request.getBodyAsString();
+        String contentType = request.getContentType();
+        if (contentType != null && PKCS7_SIGNATURE_MEDIA_TYPE.isCompatibleWith(MediaType.parseMediaType(contentType))) {
+            return new MonitoringRequest(
+                    body,
+                    request.getHeader(MonitoringConstants.TIMESTAMP_HEADER),
+                    request.getHeader(MonitoringConstants.ERROR_MESSAGE_HEADER),
+                    request.getHeader(MonitoringConstants.SOURCE_HEADER),
+                    request.getHeader(MonitoringConstants.CONTEXT_HEADER)
+            );
+        }
         return objectMapper.readValue(body, MonitoringRequest.class);
     }
 
@@ -0,0 +1,128 @@
+package au.org.aodn.oceancurrent.security;
+
+import au.org.aodn.oceancurrent.dto.ErrorResponse;
+import com.fasterxml.jackson.databind.ObjectMapper;
+import jakarta.servlet.FilterChain;
+import jakarta.servlet.ServletException;
+import jakarta.servlet.http.HttpServletRequest;
+import jakarta.servlet.http.HttpServletResponse;
+import lombok.RequiredArgsConstructor;
+import lombok.extern.slf4j.Slf4j;
+import org.springframework.core.Ordered;
+import org.springframework.core.annotation.Order;
+import org.springframework.http.HttpHeaders;
+import org.springframework.http.HttpStatus;
+import org.springframework.http.MediaType;
+import org.springframework.lang.NonNull;
+import org.springframework.stereotype.Component;
+import org.springframework.web.filter.OncePerRequestFilter;
+
+import java.io.IOException;
+import java.io.InputStream;
+import java.util.Collections;
+import java.util.Enumeration;
+import java.util.List;
+import java.util.zip.GZIPInputStream;
+
+/**
+ * Decompresses gzip-encoded request bodies sent to the monitoring endpoints.
+ * <p>
+ * Runs ahead of the security filter chain so that the EC2 instance authentication filter
+ * and the controller both see the plain request body. The decompressed size is capped
+ * to protect against compression bombs.
+ */
+@Component
+@Order(Ordered.HIGHEST_PRECEDENCE)
+@Slf4j
+@RequiredArgsConstructor
+public class GzipRequestDecompressionFilter extends OncePerRequestFilter {
+
+    private static final String MONITORING_PATH = "/api/v1/monitoring";
+    private static final String GZIP_ENCODING = "gzip";
+    static final int MAX_DECOMPRESSED_BODY_BYTES = 1024 * 1024;
+
+    private final ObjectMapper objectMapper;
+
+    @Override
+    protected boolean shouldNotFilter(HttpServletRequest request) {
+        String contentEncoding = request.getHeader(HttpHeaders.CONTENT_ENCODING);
+        return !request.getRequestURI().startsWith(MONITORING_PATH)
+                || contentEncoding == null
+                || !GZIP_ENCODING.equalsIgnoreCase(contentEncoding.trim());
+    }
+
+    @Override
+    protected void doFilterInternal(@NonNull HttpServletRequest request,
+                                    @NonNull HttpServletResponse response,
+                                    @NonNull FilterChain filterChain) throws ServletException, IOException {
+
+        byte[] body;
+        try (InputStream gzipInputStream = new GZIPInputStream(request.getInputStream())) {
+            body = gzipInputStream.readNBytes(MAX_DECOMPRESSED_BODY_BYTES + 1);
+        } catch (IOException e) {
+            log.warn("[MONITORING-GZIP] Invalid gzip request body | Path={} | Error={}",
+                    request.getRequestURI(), e.getMessage());
+            sendErrorResponse(response, HttpStatus.BAD_REQUEST, "Invalid gzip request body");
+            return;
+        }
+
+        if (body.length > MAX_DECOMPRESSED_BODY_BYTES) {
+            log.warn("[MONITORING-GZIP] Decompressed request body too large | Path={} | MaxBytes={}",
+                    request.getRequestURI(), MAX_DECOMPRESSED_BODY_BYTES);
+            sendErrorResponse(response, HttpStatus.PAYLOAD_TOO_LARGE, "Decompressed request body too large");
+            return;
+        }
+
+        filterChain.doFilter(new DecompressedHttpServletRequest(request, body), response);
+    }
+
+    private void sendErrorResponse(HttpServletResponse response, HttpStatus status, String message) throws IOException {
+        response.setStatus(status.value());
+        response.setContentType(MediaType.APPLICATION_JSON_VALUE);
+
+        ErrorResponse errorResponse = new ErrorResponse(status.getReasonPhrase(), Collections.singletonList(message));
+
+        response.getWriter().write(objectMapper.writeValueAsString(errorResponse));
+        response.getWriter().flush();
+    }
+
+    /**
+     * Request carrying the decompressed body, with the Content-Encoding header removed
+     * so downstream consumers treat the body as plain content.
+     */
+    private static class DecompressedHttpServletRequest extends CachedBodyHttpServletRequest {
+
+        DecompressedHttpServletRequest(HttpServletRequest request, byte[] body) {
+            super(request, body);
+        }
+
+        @Override
+        public String getHeader(String name) {
+            if (HttpHeaders.CONTENT_ENCODING.equalsIgnoreCase(name)) {
+                return null;
+            }
+            if (HttpHeaders.CONTENT_LENGTH.equalsIgnoreCase(name)) {
+                return String.valueOf(getContentLength());
+            }
+            return super.getHeader(name);
+        }
+
+        @Override
+        public Enumeration<String> getHeaders(String name) {
+            if (HttpHeaders.CONTENT_ENCODING.equalsIgnoreCase(name)) {
+                return Collections.emptyEnumeration();
+            }
+            if (HttpHeaders.CONTENT_LENGTH.equalsIgnoreCase(name)) {
+                return Collections.enumeration(List.of(String.valueOf(getContentLength())));
+            }
+            return super.getHeaders(name);
+        }
+
+        @Override
+        public Enumeration<String> getHeaderNames() {
+            List<String> headerNames = Collections.list(super.getHeaderNames());
+            headerNames.removeIf(HttpHeaders.CONTENT_ENCODING::equalsIgnoreCase);
+            return Collections.enumeration(headerNames);
+        }
+    }
+}
@@ -167,4 +167,108 @@ public class MonitoringControllerTest {
                 .andExpect(jsonPath("$.status", is("success")))
                 .andExpect(jsonPath("$.loggedError", is("Monitoring health check endpoint triggered")));
     }
+
+    @Test
+    public void testTriggerFatalLog_WithPkcs7BodyAndHeaders() throws Exception {
+        // When & Then - raw PKCS7 body, remaining fields passed as headers
+        mockMvc.perform(post("/monitoring/fatal-log")
+                        .contentType("application/pkcs7-signature")
+                        .content("MIAGCSqGSIb3DQEHAqCAMIACAQExCzAJBgUrDgMCGgUAMIAG")
+                        .header("X-Timestamp", "2025-11-28T12:00:00Z")
+                        .header("X-Error-Message", "File scan failed while generating JSON index")
+                        .header("X-Source", "daily-sync-job")
+                        .header("X-Context", "exit_code=1"))
+                .andDo(print())
+                .andExpect(status().isOk())
+                .andExpect(content().contentType(MediaType.APPLICATION_JSON))
+                .andExpect(jsonPath("$.status", is("success")))
+                .andExpect(jsonPath("$.logLevel", is("FATAL")))
+                .andExpect(jsonPath("$.loggedError",
+                        is("File scan failed while generating JSON index [source=daily-sync-job] [context=exit_code=1]")));
+    }
+
+    @Test
+    public void testTriggerFatalLog_WithPkcs7BodyAndNoHeaders() throws Exception {
+        // When & Then - headers are optional, should use default message
+        mockMvc.perform(post("/monitoring/fatal-log")
+                        .contentType("application/pkcs7-signature")
+                        .content("MIAGCSqGSIb3DQEHAqCAMIACAQExCzAJBgUrDgMCGgUAMIAG"))
+                .andDo(print())
+                .andExpect(status().isOk())
+                .andExpect(jsonPath("$.loggedError", is("Monitoring health check endpoint triggered")));
+    }
+
+    @Test
+    public void testTriggerFatalLogBatch_WithMultipleEvents() throws Exception {
+        // Given
+        String requestBody = """
+                {
+                    "timestamp": "2025-11-28T12:00:00Z",
+                    "events": [
+                        {
+                            "timestamp": "2025-11-28T11:58:30Z",
+                            "errorMessage": "File scan failed",
+                            "source": "daily-sync-job"
+                        },
+                        {
+                            "errorMessage": "Index upload failed",
+                            "context": "exit_code=2"
+                        }
+                    ]
+                }
+                """;
+
+        // When & Then
+        mockMvc.perform(post("/monitoring/fatal-log/batch")
+                        .contentType(MediaType.APPLICATION_JSON)
+                        .content(requestBody))
+                .andDo(print())
+                .andExpect(status().isOk())
+                .andExpect(content().contentType(MediaType.APPLICATION_JSON))
+                .andExpect(jsonPath("$.status", is("success")))
+                .andExpect(jsonPath("$.message", is("2 fatal logs generated successfully for monitoring purposes")))
+                .andExpect(jsonPath("$.timestamp", notNullValue()))
+                .andExpect(jsonPath("$.logLevel", is("FATAL")))
+                .andExpect(jsonPath("$.loggedCount", is(2)))
+                .andExpect(jsonPath("$.loggedErrors[0]",
+                        is("File scan failed [source=daily-sync-job] [eventTimestamp=2025-11-28T11:58:30Z]")))
+                .andExpect(jsonPath("$.loggedErrors[1]", is("Index upload failed [context=exit_code=2]")));
+    }
+
+    @Test
+    public void testTriggerFatalLogBatch_WithEmptyEvent_UsesDefaultMessage() throws Exception {
+        // Given
+        String requestBody = """
+                {
+                    "events": [{}]
+                }
+                """;
+
+        // When & Then
+        mockMvc.perform(post("/monitoring/fatal-log/batch")
+                        .contentType(MediaType.APPLICATION_JSON)
+                        .content(requestBody))
+                .andDo(print())
+                .andExpect(status().isOk())
+                .andExpect(jsonPath("$.loggedCount", is(1)))
+                .andExpect(jsonPath("$.loggedErrors[0]", is("Monitoring health check endpoint triggered")));
+    }
+
+    @Test
+    public void testTriggerFatalLogBatch_WithNoEvents_ReturnsBadRequest() throws Exception {
+        // Given
+        String requestBody = """
+                {
+                    "events": []
+                }
+                """;
+
+        // When & Then
+        mockMvc.perform(post("/monitoring/fatal-log/batch")
+                        .contentType(MediaType.APPLICATION_JSON)
+                        .content(requestBody))
+                .andDo(print())
+                .andExpect(status().isBadRequest())
+                .andExpect(jsonPath("$.errors[0]", is("At least one monitoring event is required")));
+    }
 }
@@ -8,6 +8,10 @@ import org.springframework.http.MediaType;
 import org.springframework.test.context.ActiveProfiles;
 import org.springframework.test.web.servlet.MockMvc;
 
+import java.io.ByteArrayOutputStream;
+import java.nio.charset.StandardCharsets;
+import java.util.zip.GZIPOutputStream;
+
 import static org.springframework.test.web.servlet.request.MockMvcRequestBuilders.post;
 import static org.springframework.test.web.servlet.request.MockMvcRequestBuilders.get;
 import static org.springframework.test.web.servlet.result.MockMvcResultHandlers.print;
@@ -76,6 +80,83 @@ public class Ec2InstanceAuthenticationFilterIntegrationTest {
                 .andExpect(jsonPath("$.errors[0]").value(containsString("Invalid instance identity")));
     }
 
+    @Test
+    public void testMonitoringEndpoint_WithEmptyPkcs7Body_ReturnUnauthorised() throws Exception {
+        // Given: A raw PKCS7 request with an empty body
+        // When & Then: Request should be rejected
+        mockMvc.perform(post("/api/v1/monitoring/fatal-log")
+                        .contentType("application/pkcs7-signature")
+                        .header("X-Error-Message", "Test error")
+                        .content(""))
+                .andDo(print())
+                .andExpect(status().isUnauthorized())
+                .andExpect(jsonPath("$.message").value("Unauthorized"))
+                .andExpect(jsonPath("$.errors[0]").value("PKCS7 signature required"));
+    }
+
+    @Test
+    public void testMonitoringEndpoint_WithInvalidPkcs7Body_ReturnUnauthorised() throws Exception {
+        // Given: A raw PKCS7 request with an invalid signature as the body
+        // When & Then: Request should be rejected due to invalid signature
+        mockMvc.perform(post("/api/v1/monitoring/fatal-log")
+                        .contentType("application/pkcs7-signature")
+                        .header("X-Error-Message", "Test error")
+                        .content("invalid-signature"))
+                .andDo(print())
+                .andExpect(status().isUnauthorized())
+                .andExpect(jsonPath("$.message").value("Unauthorized"))
+                .andExpect(jsonPath("$.errors[0]").value(containsString("Invalid instance identity")));
+    }
+
+    @Test
+    public void testMonitoringEndpoint_WithGzipBodyWithoutPkcs7_ReturnUnauthorised() throws Exception {
+        // Given: A gzip-compressed request body without PKCS7 signature
+        ByteArrayOutputStream compressed = new ByteArrayOutputStream();
+        try (GZIPOutputStream gzip = new GZIPOutputStream(compressed)) {
+            gzip.write("{\"errorMessage\": \"Test error\"}".getBytes(StandardCharsets.UTF_8));
+        }
+
+        // When & Then: Body is decompressed before authentication, so the missing signature is reported
+        mockMvc.perform(post("/api/v1/monitoring/fatal-log")
+                        .contentType(MediaType.APPLICATION_JSON)
+                        .header("Content-Encoding", "gzip")
+                        .content(compressed.toByteArray()))
+                .andDo(print())
+                .andExpect(status().isUnauthorized())
+                .andExpect(jsonPath("$.message").value("Unauthorized"))
+                .andExpect(jsonPath("$.errors[0]").value("PKCS7 signature required"));
+    }
+
+    @Test
+    public void testMonitoringBatchEndpoint_WithoutPkcs7_ReturnUnauthorised() throws Exception {
+        // Given: A batch request to monitoring endpoint without PKCS7 signature
+        String requestBody = "{\"events\": [{\"errorMessage\": \"Test error\"}]}";
+
+        // When & Then: Request should be rejected before reaching the controller
+        mockMvc.perform(post("/api/v1/monitoring/fatal-log/batch")
+                        .contentType(MediaType.APPLICATION_JSON)
+                        .content(requestBody))
+                .andDo(print())
+                .andExpect(status().isUnauthorized())
+                .andExpect(jsonPath("$.message").value("Unauthorized"))
+                .andExpect(jsonPath("$.errors[0]").value("PKCS7 signature required"));
+    }
+
+    @Test
+    public void testMonitoringBatchEndpoint_WithInvalidPkcs7Signature_ReturnUnauthorised() throws Exception {
+        // Given: A batch request with invalid PKCS7 signature
+        String requestBody = "{\"pkcs7\": \"invalid-signature\", \"events\": [{\"errorMessage\": \"Test error\"}]}";
+
+        // When & Then: Request should be rejected due to invalid signature
+        mockMvc.perform(post("/api/v1/monitoring/fatal-log/batch")
+                        .contentType(MediaType.APPLICATION_JSON)
+                        .content(requestBody))
+                .andDo(print())
+                .andExpect(status().isUnauthorized())
+                .andExpect(jsonPath("$.message").value("Unauthorized"))
+                .andExpect(jsonPath("$.errors[0]").value(containsString("Invalid instance identity")));
+    }
+
     @Test
     public void testNonMonitoringEndpoint_WithoutAuth_DoesNotBlockRequest() throws Exception {
         // Given: A request to non-monitoring endpoint without EC2 instance authentication
@@ -0,0 +1,124 @@
+package au.org.aodn.oceancurrent.security;
+
+import com.fasterxml.jackson.databind.ObjectMapper;
+import org.junit.jupiter.api.Test;
+import org.springframework.mock.web.MockFilterChain;
+import org.springframework.mock.web.MockHttpServletRequest;
+import org.springframework.mock.web.MockHttpServletResponse;
+import org.springframework.util.StreamUtils;
+
+import jakarta.servlet.http.HttpServletRequest;
+import java.io.ByteArrayOutputStream;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import java.util.zip.GZIPOutputStream;
+
+import static org.junit.jupiter.api.Assertions.*;
+
+/**
+ * Unit test for GzipRequestDecompressionFilter.
+ */
+public class GzipRequestDecompressionFilterTest {
+
+    private final GzipRequestDecompressionFilter filter = new GzipRequestDecompressionFilter(new ObjectMapper());
+
+    @Test
+    public void testGzipBody_IsDecompressedForMonitoringPath() throws Exception {
+        // Given: A gzip-encoded request to a monitoring endpoint
+        String body = "{\"errorMessage\": \"Test error\"}";
+        MockHttpServletRequest request = monitoringRequest(gzip(body));
+        MockHttpServletResponse response = new MockHttpServletResponse();
+        MockFilterChain chain = new MockFilterChain();
+
+        // When: The filter runs
+        filter.doFilter(request, response, chain);
+
+        // Then: Downstream sees the plain body without the Content-Encoding header
+        HttpServletRequest forwarded = (HttpServletRequest) chain.getRequest();
+        assertNotNull(forwarded);
+        assertEquals(body, StreamUtils.copyToString(forwarded.getInputStream(), StandardCharsets.UTF_8));
+        assertNull(forwarded.getHeader("Content-Encoding"));
+        assertEquals(body.getBytes(StandardCharsets.UTF_8).length, forwarded.getContentLength());
+    }
+
+    @Test
+    public void testUncompressedBody_IsPassedThrough() throws Exception {
+        // Given: A plain request to a monitoring endpoint
+        MockHttpServletRequest request = new MockHttpServletRequest("POST", "/api/v1/monitoring/fatal-log");
+        request.setContent("{}".getBytes(StandardCharsets.UTF_8));
+        MockFilterChain chain = new MockFilterChain();
+
+        // When: The filter runs
+        filter.doFilter(request, new MockHttpServletResponse(), chain);
+
+        // Then: The original request is forwarded unchanged
+        assertSame(request, chain.getRequest());
+    }
+
+    @Test
+    public void testGzipBody_OutsideMonitoringPath_IsPassedThrough() throws Exception {
+        // Given: A gzip-encoded request to a non-monitoring endpoint
+        MockHttpServletRequest request = new MockHttpServletRequest("POST", "/api/v1/products");
+        request.addHeader("Content-Encoding", "gzip");
+        request.setContent(gzip("{}"));
+        MockFilterChain chain = new MockFilterChain();
+
+        // When: The filter runs
+        filter.doFilter(request, new MockHttpServletResponse(), chain);
+
+        // Then: The original request is forwarded unchanged
+        assertSame(request, chain.getRequest());
+    }
+
+    @Test
+    public void testInvalidGzipBody_ReturnBadRequest() throws Exception {
+        // Given: A request claiming gzip encoding with a plain body
+        MockHttpServletRequest request = monitoringRequest("not gzip".getBytes(StandardCharsets.UTF_8));
+        MockHttpServletResponse response = new MockHttpServletResponse();
+        MockFilterChain chain = new MockFilterChain();
+
+        // When: The filter runs
+        filter.doFilter(request, response, chain);
+
+        // Then: The request is rejected before reaching the chain
+        assertEquals(400, response.getStatus());
+        assertNull(chain.getRequest());
+        assertTrue(response.getContentAsString().contains("Invalid gzip request body"));
+    }
+
+    @Test
+    public void testOversizedDecompressedBody_ReturnPayloadTooLarge() throws Exception {
+        // Given: A small gzip body that expands beyond the limit
+        byte[] oversized = new byte[GzipRequestDecompressionFilter.MAX_DECOMPRESSED_BODY_BYTES + 1];
+        MockHttpServletRequest request = monitoringRequest(gzip(oversized));
+        MockHttpServletResponse response = new MockHttpServletResponse();
+        MockFilterChain chain = new MockFilterChain();
+
+        // When: The filter runs
+        filter.doFilter(request, response, chain);
+
+        // Then: The request is rejected before reaching the chain
+        assertEquals(413, response.getStatus());
+        assertNull(chain.getRequest());
+    }
+
+    private static MockHttpServletRequest monitoringRequest(byte[] content) {
+        MockHttpServletRequest request = new MockHttpServletRequest("POST", "/api/v1/monitoring/fatal-log");
+        request.addHeader("Content-Encoding", "gzip");
+        request.setContentType("application/json");
+        request.setContent(content);
+        return request;
+    }
+
+    private static byte[] gzip(String content) throws IOException {
+        return gzip(content.getBytes(StandardCharsets.UTF_8));
+    }
+
+    private static byte[] gzip(byte[] content) throws IOException {
+        ByteArrayOutputStream bytes = new ByteArrayOutputStream();
+        try (GZIPOutputStream gzip = new GZIPOutputStream(bytes)) {
+            gzip.write(content);
+        }
+        return bytes.toByteArray();
+    }
+}